@@ -0,0 +1,49 @@
+"""Donation amount parsing and formatting shared by the analysis scripts.
+
+Amounts are held as integer cents, so sums are exact; they are only turned
+back into strings when written out.
+"""
+import re
+
+# currency symbols and thousands separators stripped before parsing
+AMOUNT_JUNK_RE = re.compile(r'[$,]')
+# sign, whole dollars and optional fraction of an amount once $ and , are removed;
+# ASCII digits only, so other Unicode digits take the float() path below
+AMOUNT_RE = re.compile(r'\s*([+-]?)([0-9]*)(?:\.([0-9]*))?\s*')
+
+
+def parse_cents(s):
+    """Parse an amount like '$1,234.56' to integer cents (123456); 0 if unparseable."""
+    if s is None:
+        return 0
+    s = AMOUNT_JUNK_RE.sub('', str(s))
+    m = AMOUNT_RE.fullmatch(s)
+    if m and (m[2] or m[3]):
+        frac = m[3] or ''
+        cents = int(m[2] or '0') * 100 + int(frac[:2].ljust(2, '0'))
+        # round half up on any digits past the cents
+        if frac[2:3] >= '5':
+            cents += 1
+        return -cents if m[1] == '-' else cents
+    # anything else float() accepts, e.g. 1e3
+    try:
+        return round(float(s) * 100)
+    except (ValueError, OverflowError):
+        return 0
+
+
+def format_cents(cents, style='trim', grouping=False):
+    """Format integer cents as a dollar amount without a currency symbol.
+
+    style 'trim' gives the shortest form ('1234', '1234.5', '27.36'), 'cents'
+    shows two decimals only when there are cents ('1234', '1234.50') and
+    'fixed' always shows two. grouping adds thousands separators.
+    """
+    sign = '-' if cents < 0 else ''
+    dollars, rem = divmod(abs(cents), 100)
+    whole = f"{dollars:,}" if grouping else str(dollars)
+    if style == 'fixed' or (rem and style == 'cents'):
+        return f"{sign}{whole}.{rem:02d}"
+    if rem == 0:
+        return f"{sign}{whole}"
+    return f"{sign}{whole}.{rem:02d}".rstrip('0')
@@ -1,40 +1,37 @@
 import os
 import csv
 
+from amounts import format_cents, parse_cents
+
 INPUT_DIR = 'data/mt-filtered'
 OUTPUT_FILE = 'output/totals.txt'
 
-def get_amount_field(row):
+def get_amount_index(header):
 	# Prefer AMNT, fallback to AMOUNT
-	return row.get('AMNT') or row.get('AMOUNT')
+	for name in ('AMNT', 'AMOUNT'):
+		if name in header:
+			return header.index(name)
+	return None
 
-def parse_amount(val):
-	if val is None:
-		return 0.0
-	val = val.strip().replace('$', '').replace(',', '')
-	try:
-		return float(val)
-	except ValueError:
-		return 0.0
+def format_total(cents):
+	# Format as integer if no cents, else two decimals
+	return '$' + format_cents(cents, 'cents')
 
 def main():
 	results = []
-	for filename in os.listdir(INPUT_DIR):
-		if filename.endswith('-mt.csv'):
-			base = filename[:-7]  # remove '-mt.csv'
-			path = os.path.join(INPUT_DIR, filename)
-			total = 0.0
-			with open(path, newline='', encoding='utf-8') as f:
-				reader = csv.DictReader(f)
-				for row in reader:
-					amt = parse_amount(get_amount_field(row))
-					total += amt
-			# Format as integer if no decimals, else two decimals
-			if total.is_integer():
-				total_str = f"${int(total)}"
-			else:
-				total_str = f"${total:.2f}"
-			results.append(f"{base} - {total_str}")
+	with os.scandir(INPUT_DIR) as it:
+		filenames = [e.name for e in it if e.is_file() and e.name.endswith('-mt.csv')]
+	for filename in filenames:
+		base = filename[:-7]  # remove '-mt.csv'
+		path = os.path.join(INPUT_DIR, filename)
+		total = 0
+		with open(path, newline='', encoding='utf-8') as f:
+			# Resolve the amount column once and only touch that field per row
+			reader = csv.reader(f)
+			idx = get_amount_index(next(reader, []))
+			if idx is not None:
+				total = sum(parse_cents(row[idx]) for row in reader if len(row) > idx)
+		results.append(f"{base} - {format_total(total)}")
 	# Write output
 	os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
 	with open(OUTPUT_FILE, 'w', encoding='utf-8') as out:
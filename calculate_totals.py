@@ -6,71 +6,47 @@ Usage: python3 calculate_totals.py
 import csv
 from pathlib import Path
 
+from amounts import format_cents, parse_cents
+from csv_columns import find_column, get_amount_index
+
 INPUT_PATH = Path('data/mt-filtered/prop-50-mt.csv')
 # Cities to include (case-insensitive)
-CITIES = {
+CITIES = frozenset({
     'whitefish', 'columbia falls', 'kalispell', 'polson', 'ronan',
     'alberton', 'missoula', 'stevensville', 'hamilton'
-}
-
-def parse_amount(s):
-    if s is None:
-        return 0.0
-    s = str(s).strip().replace('$', '').replace(',', '')
-    if s == '':
-        return 0.0
-    try:
-        return float(s)
-    except Exception:
-        return 0.0
-
-def get_amount_from_row(row):
-    # prefer common keys
-    for k in row:
-        if not k:
-            continue
-        kl = k.lower()
-        if kl in ('amnt', 'amount'):
-            return parse_amount(row.get(k))
-    # fallback: any field containing 'am'
-    for k in row:
-        if k and 'am' in k.lower():
-            return parse_amount(row.get(k))
-    return 0.0
+})
 
 def main():
     if not INPUT_PATH.exists():
         print(f"Input file not found: {INPUT_PATH}")
         return
 
-    donors = 0
-    total = 0.0
-    max_amt = None
-    min_amt = None
-    
-
+    amounts = []
     with INPUT_PATH.open(newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            city_raw = (row.get('CITY') or row.get('City') or '')
-            city = city_raw.strip().lower()
-            if city in CITIES:
-                donors += 1
-                amt = get_amount_from_row(row)
-                total += amt
-                if max_amt is None or amt > max_amt:
-                    max_amt = amt
-                if min_amt is None or amt < min_amt:
-                    min_amt = amt
+        reader = csv.reader(f)
+        # resolve columns once from the header instead of per-row dict lookups
+        header = next(reader, [])
+        city_idx = find_column(header, 'CITY', 'City')
+        amt_idx = get_amount_index(header)
+        if city_idx is not None:
+            # select rows for the requested cities, then aggregate their amounts in one go
+            selected = [row for row in reader if len(row) > city_idx and row[city_idx].strip().lower() in CITIES]
+            amounts = [parse_cents(row[amt_idx] if amt_idx is not None and amt_idx < len(row) else None)
+                       for row in selected]
+
+    donors = len(amounts)
+    total = sum(amounts)
+    max_amt = max(amounts, default=None)
+    min_amt = min(amounts, default=None)
 
     # Format total as rounded dollars with commas
-    total_rounded = round(total)
+    total_rounded = (total + 50) // 100
     print(f"Donors: {donors}")
     print(f"Total: ${total_rounded:,}")
     if max_amt is not None:
-        print(f"Highest: ${max_amt:,.2f}")
+        print(f"Highest: ${format_cents(max_amt, 'fixed', grouping=True)}")
     if min_amt is not None:
-        print(f"Lowest: ${min_amt:,.2f}")
+        print(f"Lowest: ${format_cents(min_amt, 'fixed', grouping=True)}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,31 @@
+"""CSV header helpers shared by calculate_totals.py and map-to-municipality.py.
+
+Columns are resolved once from the header so rows can stay plain lists.
+"""
+
+
+def get_amount_index(fieldnames):
+    """Return the index of the amount column in fieldnames, or None.
+
+    AMNT / AMOUNT match case-insensitively; failing that, the first column
+    whose name contains 'am' is used.
+    """
+    for i, k in enumerate(fieldnames):
+        if not k:
+            continue
+        kl = k.lower()
+        if kl in ('amnt', 'amount'):
+            return i
+    # fallback: any field containing 'am'
+    for i, k in enumerate(fieldnames):
+        if k and 'am' in k.lower():
+            return i
+    return None
+
+
+def find_column(fieldnames, *names):
+    """Return the index of the first of names present in fieldnames, or None."""
+    for name in names:
+        if name in fieldnames:
+            return fieldnames.index(name)
+    return None
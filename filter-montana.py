@@ -1,8 +1,12 @@
 import os
 import csv
+import multiprocessing as mp
+import re
 
 INPUT_DIR = 'data/all-states'
 OUTPUT_DIR = 'data/mt-filtered'
+# characters that make csv.writer quote a field (the delimiter is checked separately)
+NEEDS_QUOTING_RE = re.compile(r'["\r\n]')
 
 def normalize_amount(value):
 	if value is None:
@@ -20,31 +24,58 @@ def normalize_amount(value):
 	except ValueError:
 		return value
 
-def filter_mt_entries(input_path, output_path, normalize_amounts=False):
+def read_mt_rows(input_path, normalize_amounts=False):
+	"""Return (fieldnames, rows) for the STATE == MT rows of input_path."""
 	with open(input_path, newline='', encoding='utf-8') as infile:
-		reader = csv.DictReader(infile)
-		fieldnames = reader.fieldnames
-		with open(output_path, 'w', newline='', encoding='utf-8') as outfile:
-			writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-			writer.writeheader()
-			for row in reader:
-				if row.get('STATE') == 'MT':
-					if normalize_amounts and 'AMOUNT' in row:
-						row['AMOUNT'] = normalize_amount(row['AMOUNT'])
-					writer.writerow(row)
+		reader = csv.reader(infile)
+		fieldnames = next(reader, [])
+		width = len(fieldnames)
+		# Resolve column positions once instead of building a dict per row
+		state_idx = fieldnames.index('STATE') if 'STATE' in fieldnames else None
+		amount_idx = fieldnames.index('AMOUNT') if normalize_amounts and 'AMOUNT' in fieldnames else None
+		kept = []
+		if state_idx is not None:
+			kept = [row for row in reader if len(row) > state_idx and row[state_idx] == 'MT']
+	for row in kept:
+		if len(row) < width:
+			row.extend([''] * (width - len(row)))
+		if amount_idx is not None:
+			row[amount_idx] = normalize_amount(row[amount_idx])
+	return fieldnames, kept
 
-def main():
-	for filename in os.listdir(INPUT_DIR):
-		if filename.endswith('-all.csv'):
-			base = filename[:-8]  # remove '-all.csv'
-			input_path = os.path.join(INPUT_DIR, filename)
-			output_filename = f'{base}-mt.csv'
-			output_path = os.path.join(OUTPUT_DIR, output_filename)
-			# Only normalize AMOUNT for prop-50
-			if base == 'prop-50':
-				filter_mt_entries(input_path, output_path, normalize_amounts=True)
+def write_rows(output_path, fieldnames, rows):
+	with open(output_path, 'w', newline='', encoding='utf-8') as outfile:
+		writer = csv.writer(outfile)
+		for row in [fieldnames] + rows:
+			# Fast path: when no field needs quoting, the joined line is exactly
+			# what csv.writer would produce; only other rows go through it
+			line = ','.join(row)
+			if len(row) > 1 and line.count(',') == len(row) - 1 and not NEEDS_QUOTING_RE.search(line):
+				outfile.write(line + '\r\n')
 			else:
-				filter_mt_entries(input_path, output_path)
+				writer.writerow(row)
+
+def filter_mt_entries(input_path, output_path, normalize_amounts=False):
+	fieldnames, rows = read_mt_rows(input_path, normalize_amounts)
+	write_rows(output_path, fieldnames, rows)
+
+def main():
+	jobs = []
+	with os.scandir(INPUT_DIR) as it:
+		filenames = [e.name for e in it if e.is_file() and e.name.endswith('-all.csv')]
+	for filename in filenames:
+		base = filename[:-8]  # remove '-all.csv'
+		input_path = os.path.join(INPUT_DIR, filename)
+		output_filename = f'{base}-mt.csv'
+		output_path = os.path.join(OUTPUT_DIR, output_filename)
+		# Only normalize AMOUNT for prop-50
+		jobs.append((input_path, output_path, base == 'prop-50'))
+	if not jobs:
+		return
+	# Each input file is independent, so filter them in parallel
+	nproc = min(len(jobs), os.cpu_count() or 1)
+	with mp.Pool(nproc, maxtasksperchild=4) as pool:
+		pool.starmap(filter_mt_entries, jobs)
 
 if __name__ == '__main__':
 	main()
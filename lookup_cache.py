@@ -0,0 +1,76 @@
+"""Pickle cache for lookup tables parsed from data/ (ZIP coordinates,
+municipality points).
+
+cached_load() is shared by make_half_aggregated.py and map-to-municipality.py
+so both rebuild a table under the same rules: when its source file changes,
+when the scripts that build it change, or when CACHE_VERSION is bumped.
+"""
+import hashlib
+import json
+import os
+import pickle
+
+CACHE_DIR = os.path.join('data', '.cache')
+# bump to invalidate every cached table, e.g. when the pickle layout changes
+CACHE_VERSION = 1
+
+
+def builder_digest(build_fn):
+    """Return a digest of the Python sources next to build_fn (its bytecode if unreadable).
+
+    Hashing the defining script and its sibling modules also covers helpers
+    build_fn calls, such as the column heuristics used while reading a ZIP
+    CSV or the shared ZIP token rules in zip_tokens.py.
+    """
+    code = build_fn.__code__
+    src_dir = os.path.dirname(os.path.abspath(code.co_filename))
+    h = hashlib.sha1()
+    try:
+        for entry in sorted(os.scandir(src_dir), key=lambda e: e.name):
+            if entry.name.endswith('.py') and entry.is_file():
+                h.update(entry.name.encode('utf-8'))
+                with open(entry.path, 'rb') as f:
+                    h.update(f.read())
+    except OSError:
+        return hashlib.sha1(code.co_code).hexdigest()
+    return h.hexdigest()
+
+
+def cached_load(path, name, build_fn, cache_dir=CACHE_DIR):
+    """Return build_fn(path), reusing a pickle in cache_dir while nothing changed.
+
+    The cache is keyed on CACHE_VERSION, the builder's digest and the source
+    path, mtime and size, recorded in a <name>.meta.json sidecar next to
+    <name>.pkl.
+    """
+    st = os.stat(path)
+    meta = {
+        'version': CACHE_VERSION,
+        'builder': f'{build_fn.__qualname__}:{builder_digest(build_fn)}',
+        'source': os.path.abspath(path),
+        'mtime_ns': st.st_mtime_ns,
+        'size': st.st_size,
+    }
+    cache_path = os.path.join(cache_dir, f'{name}.pkl')
+    meta_path = os.path.join(cache_dir, f'{name}.meta.json')
+    try:
+        with open(meta_path, encoding='utf-8') as mf:
+            if json.load(mf) == meta:
+                with open(cache_path, 'rb') as cf:
+                    return pickle.load(cf)
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+        pass
+    data = build_fn(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # write to temp files and rename so readers never see a partial cache
+        tmp = f'.{os.getpid()}.tmp'
+        with open(cache_path + tmp, 'wb') as cf:
+            pickle.dump(data, cf, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(cache_path + tmp, cache_path)
+        with open(meta_path + tmp, 'w', encoding='utf-8') as mf:
+            json.dump(meta, mf)
+        os.replace(meta_path + tmp, meta_path)
+    except OSError:
+        pass
+    return data
@@ -13,6 +13,10 @@ import json
 import os
 from pathlib import Path
 
+from amounts import format_cents, parse_cents
+from lookup_cache import cached_load
+from zip_tokens import KEEP_DIGITS, normalize_zip_token
+
 INPUT_CSV = Path('data/mt-filtered/prop-50-mt.csv')
 ZIP_CSV = Path('data/zipcodes.csv')
 MUNI_GEOJSON = Path('data/mt-municipalities-1m.geojson')
@@ -20,7 +24,7 @@ OUTPUT_DIR = Path('output/part-aggregated')
 OUTPUT_FILE = OUTPUT_DIR / 'prop-50-mt-partial.geojson'
 
 # Cities to aggregate (normalized lower-case)
-AGG_CITIES = {'bozeman', 'missoula', 'livingston'}
+AGG_CITIES = frozenset({'bozeman', 'missoula', 'livingston'})
 
 # Fixed coordinates (lon, lat) for aggregated cities
 FIXED_COORDS = {
@@ -30,54 +34,61 @@ FIXED_COORDS = {
 }
 
 
-def parse_amount(s):
-    if s is None:
-        return 0.0
-    s = str(s).strip().replace('$', '').replace(',', '')
-    if s == '':
-        return 0.0
-    try:
-        return float(s)
-    except Exception:
-        return 0.0
-
-
 def load_zip_map():
     # load ZIP mapping similar to other scripts; support ZIP+4 and 5-digit
     mapping = {}
     path = ZIP_CSV if ZIP_CSV.exists() else None
     if not path:
         # try to find any csv with 'zip' in data/
-        for fn in os.listdir('data'):
-            if fn.lower().endswith('.csv') and 'zip' in fn.lower():
-                path = Path('data') / fn
-                break
+        with os.scandir('data') as it:
+            fn = next((e.name for e in it if e.name.lower().endswith('.csv') and 'zip' in e.name.lower()), None)
+        if fn:
+            path = Path('data') / fn
     if not path or not path.exists():
         print('No ZIP mapping found, ZIP lookups disabled')
         return mapping
+    mapping = cached_load(path, 'zip_map', read_zip_map)
+    print(f'Loaded {len(mapping)} ZIP mappings from {path}')
+    return mapping
+
+
+def find_zip_columns(fieldnames):
+    """Return (zip_idx, lat_idx, lon_idx) for a ZIP mapping CSV header; None where missing."""
+    # heuristics to find columns
+    keys = {}
+    for i, k in enumerate(fieldnames):
+        keys.setdefault(k.lower(), i)
+    zip_k = next((keys[k] for k in ('zip', 'postal code', 'postal_code', 'postalcode') if k in keys), None)
+    lat_k = next((keys[k] for k in ('latitude', 'lat') if k in keys), None)
+    lon_k = next((keys[k] for k in ('longitude', 'lon', 'lng') if k in keys), None)
+    if zip_k is None or lat_k is None or lon_k is None:
+        for i, k in enumerate(fieldnames):
+            kl = k.lower()
+            if 'zip' in kl and zip_k is None:
+                zip_k = i
+            if 'lat' in kl and lat_k is None:
+                lat_k = i
+            if ('lon' in kl or 'lng' in kl) and lon_k is None:
+                lon_k = i
+    return zip_k, lat_k, lon_k
+
+
+def read_zip_map(path):
+    mapping = {}
     with path.open(newline='', encoding='utf-8') as f:
-        r = csv.DictReader(f)
+        r = csv.reader(f)
+        # the header is the same for every row, so resolve the columns once
+        zip_k, lat_k, lon_k = find_zip_columns(next(r, []))
+        if zip_k is None or lat_k is None or lon_k is None:
+            return mapping
+        width = max(zip_k, lat_k, lon_k) + 1
         for row in r:
-            # heuristics to find columns
-            keys = {k.lower(): k for k in row.keys()}
-            zip_k = keys.get('zip') or keys.get('postal code') or keys.get('postal_code') or keys.get('postalcode')
-            lat_k = keys.get('latitude') or keys.get('lat')
-            lon_k = keys.get('longitude') or keys.get('lon') or keys.get('lng')
-            if not zip_k or not lat_k or not lon_k:
-                for k in row:
-                    kl = k.lower()
-                    if 'zip' in kl and not zip_k:
-                        zip_k = k
-                    if 'lat' in kl and not lat_k:
-                        lat_k = k
-                    if ('lon' in kl or 'lng' in kl) and not lon_k:
-                        lon_k = k
-            if not zip_k or not lat_k or not lon_k:
+            if len(row) < width:
                 continue
-            raw = (row.get(zip_k) or '').strip()
+            raw = row[zip_k].strip()
             if not raw:
                 continue
-            digits = ''.join(ch for ch in raw if ch.isdigit())
+            digits = raw.translate(KEEP_DIGITS)
             if '-' in raw:
                 full = raw
             elif len(digits) == 9:
@@ -85,23 +96,26 @@ def load_zip_map():
             else:
                 full = digits[:5]
             try:
-                lat = float(row.get(lat_k))
-                lon = float(row.get(lon_k))
+                lat = float(row[lat_k])
+                lon = float(row[lon_k])
             except Exception:
                 continue
             mapping[full] = [lon, lat]
             five = full.split('-')[0]
             if five not in mapping:
                 mapping[five] = [lon, lat]
-    print(f'Loaded {len(mapping)} ZIP mappings from {path}')
     return mapping
 
 
 def load_municipal_centroids():
-    pts = {}
     if not MUNI_GEOJSON.exists():
-        return pts
-    with MUNI_GEOJSON.open(encoding='utf-8') as f:
+        return {}
+    return cached_load(MUNI_GEOJSON, 'muni_centroids', read_municipal_centroids)
+
+
+def read_municipal_centroids(path):
+    pts = {}
+    with path.open(encoding='utf-8') as f:
         gj = json.load(f)
     for feat in gj.get('features', []):
         name = feat.get('properties', {}).get('NAME')
@@ -123,20 +137,6 @@ def load_municipal_centroids():
     return pts
 
 
-def normalize_zip_token(s):
-    s = (s or '').strip()
-    if not s:
-        return None
-    digits = ''.join(ch for ch in s if ch.isdigit())
-    if '-' in s:
-        return s
-    if len(digits) == 9:
-        return f"{digits[:5]}-{digits[5:]}"
-    if len(digits) >= 5:
-        return digits[:5]
-    return None
-
-
 def main():
     zip_map = load_zip_map()
     muni_pts = load_municipal_centroids()
@@ -146,16 +146,23 @@ def main():
         return
 
     # accumulators
-    agg_sums = {c: 0.0 for c in AGG_CITIES}
+    agg_sums = {c: 0 for c in AGG_CITIES}  # integer cents
     agg_counts = {c: 0 for c in AGG_CITIES}
     features = []
+    # (zip_raw, city) -> coords; ZIPs and cities repeat heavily, so each
+    # distinct pair goes through the ZIP / municipality fallback only once
+    coord_cache = {}
 
     with INPUT_CSV.open(newline='', encoding='utf-8') as f:
         r = csv.DictReader(f)
+        fields = r.fieldnames or []
+        # resolve column names once instead of evaluating fallbacks per row
+        city_key = 'CITY' if 'CITY' in fields else 'City'
+        amnt_key = 'AMNT' if 'AMNT' in fields else 'AMOUNT'
+        zip_key = next((k for k in ('ZIP', 'Zip', 'zip') if k in fields), 'ZIP')
         for row in r:
-            city_raw = (row.get('CITY') or row.get('City') or '')
-            city = city_raw.strip().lower()
-            amt = parse_amount(row.get('AMNT') or row.get('AMOUNT') or '')
+            city = (row.get(city_key) or '').strip().lower()
+            amt = parse_cents(row.get(amnt_key))
 
             if city in AGG_CITIES:
                 agg_sums[city] += amt
@@ -164,13 +171,18 @@ def main():
 
             # non-aggregated: produce per-row feature
             # prefer ZIP mapping
-            zip_raw = (row.get('ZIP') or row.get('Zip') or row.get('zip') or '')
-            zip_tok = normalize_zip_token(zip_raw)
-            coords = None
-            if zip_tok:
-                coords = zip_map.get(zip_tok)
-            if not coords:
-                coords = muni_pts.get(city)
+            zip_raw = row.get(zip_key) or ''
+            key = (zip_raw, city)
+            if key in coord_cache:
+                coords = coord_cache[key]
+            else:
+                zip_tok = normalize_zip_token(zip_raw)
+                coords = None
+                if zip_tok:
+                    coords = zip_map.get(zip_tok)
+                if not coords:
+                    coords = muni_pts.get(city)
+                coord_cache[key] = coords
             if not coords:
                 # skip if no coords
                 continue
@@ -178,8 +190,8 @@ def main():
 
     # add aggregated features (one per AGG_CITIES city)
     for c in AGG_CITIES:
-        total = agg_sums.get(c, 0.0)
-        if total == 0.0:
+        total = agg_sums.get(c, 0)
+        if total == 0:
             continue
         coords = FIXED_COORDS.get(c)
         if not coords:
@@ -189,7 +201,7 @@ def main():
             continue
         props = {
             'NAME OF CONTRIBUTOR': c.title(),
-            'AMNT': str(int(round(total))) if abs(total - int(total)) < 1e-9 else str(total)
+            'AMNT': format_cents(total)
         }
         # ensure other common columns are present but empty
         for k in ['ZIP', 'EMPLOYER', 'ADDRESS', 'PHONE']:
@@ -203,7 +215,7 @@ def main():
 
     print(f'Wrote {len(features)} features to {OUTPUT_FILE}')
     for c in AGG_CITIES:
-        print(f'{c.title()}: donors={agg_counts.get(c,0)}, total=${int(round(agg_sums.get(c,0.0))):,}')
+        print(f'{c.title()}: donors={agg_counts.get(c,0)}, total=${(agg_sums.get(c, 0) + 50) // 100:,}')
 
 
 if __name__ == '__main__':
@@ -1,15 +1,30 @@
 import os
 import csv
 import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from amounts import format_cents, parse_cents
+from csv_columns import find_column, get_amount_index
+from lookup_cache import cached_load
+from zip_tokens import KEEP_DIGITS, normalize_zip_token
 
 INPUT_DIR = 'data/mt-filtered'
 GEOJSON_PATH = 'data/mt-municipalities-1m.geojson'
 OUTPUT_DIR = 'output/geojson'
 OUTPUT_AGG = 'output/aggregated-geojson'
 ZIP_MAPPING_PATH = 'data/mt-zipcodes.csv'  # optional zipcode -> lat/lon CSV
+# one shared encoder instead of json.dumps building a new one per feature
+JSON_ENCODER = json.JSONEncoder(indent=2)
+# manual (lon, lat) overrides for city aliases
+MANUAL_CITY_COORDS = {
+	'butte': [-112.5393, 45.9987],
+	'anaconda': [-112.9438, 46.1243],
+}
 
 def load_municipalities():
-	with open(GEOJSON_PATH, encoding='utf-8') as f:
+	return cached_load(GEOJSON_PATH, 'city_points', read_municipalities)
+
+def read_municipalities(path):
+	with open(path, encoding='utf-8') as f:
 		gj = json.load(f)
 	# Map city name (lowercase, stripped) to a single point from the polygon
 	city_points = {}
@@ -44,207 +59,237 @@ def load_municipalities():
 	return city_points
 
 
-def parse_amount(s):
-	"""Parse amount-like strings to float. Handles $, commas, empty values."""
-	if s is None:
-		return 0.0
-	s = str(s).strip().replace('$', '').replace(',', '')
-	if s == '':
-		return 0.0
-	try:
-		return float(s)
-	except Exception:
-		return 0.0
+def load_zip_codes():
+	# attempt to load zipcode mapping if available; this is optional
+	zip_points = {}
+	# primary expected path
+	path = ZIP_MAPPING_PATH
+	if not os.path.exists(path):
+		# try to find any csv in data/ that contains 'zip'
+		with os.scandir('data') as it:
+			fn = next((e.name for e in it if e.name.lower().endswith('.csv') and 'zip' in e.name.lower()), None)
+		if fn:
+			path = os.path.join('data', fn)
+	if not os.path.exists(path):
+		print(f"No ZIP mapping CSV found at {ZIP_MAPPING_PATH} or in data/; ZIP lookups disabled")
+		return zip_points
+	zip_points = cached_load(path, 'zip_points', read_zip_codes)
+	print(f"Loaded {len(zip_points)} ZIP mappings from {path}")
+	return zip_points
+
+def find_zip_columns(fieldnames):
+	"""Return (zip_idx, lat_idx, lon_idx) for a ZIP mapping CSV header; None where missing."""
+	# find zip column
+	zip_k = None
+	lat_k = None
+	lon_k = None
+	for i, k in enumerate(fieldnames):
+		kl = k.lower()
+		if 'zip' == kl or kl.startswith('zip'):
+			zip_k = i
+		elif kl in ('lat', 'latitude'):
+			lat_k = i
+		elif kl in ('lon', 'lng', 'long', 'longitude'):
+			lon_k = i
+	# fallback: attempt common names
+	if zip_k is None:
+		for i, k in enumerate(fieldnames):
+			if 'zip' in k.lower():
+				zip_k = i
+	if lat_k is None or lon_k is None:
+		for i, k in enumerate(fieldnames):
+			kl = k.lower()
+			if 'lat' in kl and lat_k is None:
+				lat_k = i
+			if ('lon' in kl or 'lng' in kl or 'long' in kl) and lon_k is None:
+				lon_k = i
+	return zip_k, lat_k, lon_k
+
+def read_zip_codes(path):
+	zip_points = {}
+	# read CSV - support a few column name variants
+	with open(path, newline='', encoding='utf-8') as zf:
+		r = csv.reader(zf)
+		# the header is the same for every row, so resolve the columns once
+		zip_k, lat_k, lon_k = find_zip_columns(next(r, []))
+		if zip_k is None or lat_k is None or lon_k is None:
+			return zip_points
+		width = max(zip_k, lat_k, lon_k) + 1
+		for row in r:
+			if len(row) < width:
+				continue
+			raw_zip = row[zip_k].strip()
+			if raw_zip == '':
+				continue
+			# normalize zip token: accept 5-digit, 5-4 (ZIP+4), or 9-digit contiguous
+			zip_digits = raw_zip.translate(KEEP_DIGITS)
+			full = None
+			if '-' in raw_zip:
+				# assume in correct 5-4 format if it contains a dash
+				full = raw_zip
+			elif len(zip_digits) == 9:
+				full = f"{zip_digits[:5]}-{zip_digits[5:]}"
+			elif len(zip_digits) >= 5:
+				full = zip_digits[:5]
+			else:
+				continue
+			zip5 = full.split('-')[0]
+			try:
+				lat = float(row[lat_k])
+				lon = float(row[lon_k])
+				# store full token mapping
+				zip_points[full] = [lon, lat]
+				# ensure a 5-digit fallback exists (don't overwrite existing 5-digit entries)
+				if zip5 not in zip_points:
+					zip_points[zip5] = [lon, lat]
+			except Exception:
+				continue
+	return zip_points
 
+def lookup_zip_coords(zip_raw, zip_points):
+	"""Return [lon, lat] for a ZIP / ZIP+4 / 9-digit token, or None."""
+	if not zip_raw:
+		return None
+	token = normalize_zip_token(str(zip_raw))
+	if not token:
+		return None
+	# try full token first, then 5-digit fallback
+	return zip_points.get(token) or zip_points.get(token.split('-')[0])
 
-def get_amount_from_row(row):
-	# Look for common amount field names (case-insensitive)
-	for k in row:
-		if not k:
+def build_agg_features(agg):
+	"""Yield one Point feature per aggregated city with its summed AMNT."""
+	for c, info in agg.items():
+		coords = info.get('coords')
+		if not coords:
 			continue
-		kl = k.lower()
-		if kl in ('amnt', 'amount'):
-			return parse_amount(row.get(k))
-	# fallback: try any field that contains 'am' and a digit
-	for k in row:
-		if k and 'am' in k.lower():
-			return parse_amount(row.get(k))
-	return 0.0
+		# format amount: integer-like values should be whole numbers
+		amt_str = format_cents(info.get('sum', 0))
+		yield {
+			"type": "Feature",
+			"geometry": {"type": "Point", "coordinates": coords},
+			"properties": {"CITY": info.get('city'), "STATE": info.get('state'), "AMNT": amt_str}
+		}
 
-def main():
-	os.makedirs(OUTPUT_DIR, exist_ok=True)
-	city_points = load_municipalities()
+def map_rows(fieldnames, rows, city_points, zip_points, agg, matched, unmatched):
+	"""Yield a Point feature per locatable CSV row (a list of values in fieldnames order).
 
-	# attempt to load zipcode mapping if available; this is optional
-	def load_zip_codes():
-		zip_points = {}
-		# primary expected path
-		path = ZIP_MAPPING_PATH
-		if not os.path.exists(path):
-			# try to find any csv in data/ that contains 'zip'
-			for fn in os.listdir('data'):
-				if fn.lower().endswith('.csv') and 'zip' in fn.lower():
-					path = os.path.join('data', fn)
-					break
-		if not os.path.exists(path):
-			print(f"No ZIP mapping CSV found at {ZIP_MAPPING_PATH} or in data/; ZIP lookups disabled")
-			return zip_points
-		# read CSV - support a few column name variants
-		with open(path, newline='', encoding='utf-8') as zf:
-			r = csv.DictReader(zf)
-			for row in r:
-				# find zip column
-				zip_k = None
-				lat_k = None
-				lon_k = None
-				for k in row:
-					kl = k.lower()
-					if 'zip' == kl or kl.startswith('zip'):
-						zip_k = k
-					elif kl in ('lat', 'latitude'):
-						lat_k = k
-					elif kl in ('lon', 'lng', 'long', 'longitude'):
-						lon_k = k
-				# fallback: attempt common names
-				if zip_k is None:
-					for k in row:
-						if 'zip' in k.lower():
-							zip_k = k
-				if lat_k is None or lon_k is None:
-					for k in row:
-						kl = k.lower()
-						if 'lat' in kl and lat_k is None:
-							lat_k = k
-						if ('lon' in kl or 'lng' in kl or 'long' in kl) and lon_k is None:
-							lon_k = k
-				if not zip_k or not lat_k or not lon_k:
-					continue
-				raw_zip = (row.get(zip_k) or '').strip()
-				if raw_zip == '':
-					continue
-				# normalize zip token: accept 5-digit, 5-4 (ZIP+4), or 9-digit contiguous
-				zip_digits = ''.join(ch for ch in raw_zip if ch.isdigit())
-				full = None
-				if '-' in raw_zip:
-					# assume in correct 5-4 format if it contains a dash
-					full = raw_zip
-				elif len(zip_digits) == 9:
-					full = f"{zip_digits[:5]}-{zip_digits[5:]}"
-				elif len(zip_digits) >= 5:
-					full = zip_digits[:5]
-				else:
-					continue
-				zip5 = full.split('-')[0]
-				try:
-					lat = float(row.get(lat_k))
-					lon = float(row.get(lon_k))
-					# store full token mapping
-					zip_points[full] = [lon, lat]
-					# ensure a 5-digit fallback exists (don't overwrite existing 5-digit entries)
-					if zip5 not in zip_points:
-						zip_points[zip5] = [lon, lat]
-				except Exception:
-					continue
-		print(f"Loaded {len(zip_points)} ZIP mappings from {path}")
-		return zip_points
+	agg, matched and unmatched are updated in place as rows are consumed.
+	"""
+	# Resolve columns once; rows stay plain lists and a properties dict is
+	# only built for rows that become features
+	width = len(fieldnames)
+	zip_idx = find_column(fieldnames, 'ZIP', 'Zip', 'zip')
+	city_idx = find_column(fieldnames, 'CITY', 'City')
+	state_idx = find_column(fieldnames, 'STATE', 'State')
+	amount_idx = get_amount_index(fieldnames)
+	# ZIP values repeat heavily, so tokenize and look up each distinct value once
+	zip_cache = {}
+	for row in rows:
+		if len(row) < width:
+			row = row + [None] * (width - len(row))
+		# Prefer ZIP coordinates for per-row (non-aggregated) features when available
+		zip_raw = (row[zip_idx] if zip_idx is not None else None) or ''
+		if zip_raw in zip_cache:
+			zip_coords = zip_cache[zip_raw]
+		else:
+			zip_coords = zip_cache[zip_raw] = lookup_zip_coords(zip_raw, zip_points)
+		city_raw = (row[city_idx] if city_idx is not None else None) or ''
+		city = city_raw.strip().lower()
+		coords = zip_coords if zip_coords else city_points.get(city)
+		if coords:
+			matched.add(city)
+			# aggregate amounts
+			amt = parse_cents(row[amount_idx]) if amount_idx is not None else 0
+			if city not in agg:
+				agg[city] = {
+					'city': city_raw.strip(),
+					'state': ((row[state_idx] if state_idx is not None else None) or '').strip(),
+					'sum': 0,  # integer cents
+					'coords': coords
+				}
+			agg[city]['sum'] += amt
+			# feature for each row
+			yield {
+				"type": "Feature",
+				"geometry": {"type": "Point", "coordinates": coords},
+				"properties": dict(zip(fieldnames, row))
+			}
+		else:
+			if city:  # only track non-empty cities
+				unmatched.add(city)
+
+def write_feature_collection(path, features):
+	"""Stream features to path as a FeatureCollection and return how many were written.
+
+	Features are serialized one at a time, so only the current one is held in
+	memory. The layout matches json.dump(..., indent=2).
+	"""
+	count = 0
+	with open(path, 'w', encoding='utf-8') as out:
+		out.write('{\n  "type": "FeatureCollection",\n  "features": [')
+		for feature in features:
+			out.write(',\n    ' if count else '\n    ')
+			out.write(JSON_ENCODER.encode(feature).replace('\n', '\n    '))
+			count += 1
+		out.write('\n  ]\n}' if count else ']\n}')
+	return count
+
+def write_outputs(base, filename, fieldnames, rows, city_points, zip_points):
+	"""Write the per-row and aggregated GeoJSON for one input file; return a report."""
+	matched = set()
+	unmatched = set()
+	# aggregator for this file (only includes matched cities)
+	agg = {}
+	output_path = os.path.join(OUTPUT_DIR, f'{base}-mt.geojson')
+	write_feature_collection(output_path, map_rows(fieldnames, rows, city_points, zip_points, agg, matched, unmatched))
+	# write aggregated geojson for this file
+	os.makedirs(OUTPUT_AGG, exist_ok=True)
+	agg_path = os.path.join(OUTPUT_AGG, f'{base}-mt-aggregated.geojson')
+	agg_count = write_feature_collection(agg_path, build_agg_features(agg))
+
+	return '\n'.join([
+		f"\n{filename}:",
+		f"  Matched {len(matched)} unique cities: {sorted(matched)}",
+		f"  Unmatched {len(unmatched)} unique cities: {sorted(unmatched)}",
+		f"  Aggregated {agg_count} cities written to {agg_path}",
+	])
+
+def load_points():
+	"""Return (city_points, zip_points) used to place features."""
+	city_points = load_municipalities()
 
 	zip_points = load_zip_codes()
 
 	# override/add requested manual coordinates for specific aliases (user-provided lon, lat)
-	city_points['butte'] = [-112.5393, 45.9987]
-	city_points['anaconda'] = [-112.9438, 46.1243]
+	city_points.update(MANUAL_CITY_COORDS)
 
 	print(f"Loaded {len(city_points)} municipalities")
 	print(f"Sample cities: {list(city_points.keys())[:10]}")
+	return city_points, zip_points
 
-	for filename in os.listdir(INPUT_DIR):
-		if filename.endswith('-mt.csv'):
-			base = filename[:-7]
-			input_path = os.path.join(INPUT_DIR, filename)
-			output_path = os.path.join(OUTPUT_DIR, f'{base}-mt.geojson')
-			features = []
-			matched = set()
-			unmatched = set()
-			# aggregator for this file (only includes matched cities)
-			agg = {}
-			with open(input_path, newline='', encoding='utf-8') as f:
-				reader = csv.DictReader(f)
-				for row in reader:
-					# Prefer ZIP coordinates for per-row (non-aggregated) features when available
-					zip_raw = (row.get('ZIP') or row.get('Zip') or row.get('zip') or '')
-					zip_coords = None
-					if zip_raw:
-						r = str(zip_raw).strip()
-						digits = ''.join(ch for ch in r if ch.isdigit())
-						full_token = None
-						if '-' in r:
-							full_token = r
-						elif len(digits) == 9:
-							full_token = f"{digits[:5]}-{digits[5:]}"
-						elif len(digits) >= 5:
-							full_token = digits[:5]
-						if full_token:
-							# try full token first, then 5-digit fallback
-							zip_coords = zip_points.get(full_token) or zip_points.get(full_token.split('-')[0])
-					city_raw = (row.get('CITY') or row.get('City') or '')
-					city = city_raw.strip().lower()
-					coords = zip_coords if zip_coords else city_points.get(city)
-					if coords:
-						matched.add(city)
-						# feature for each row
-						feature = {
-							"type": "Feature",
-							"geometry": {"type": "Point", "coordinates": coords},
-							"properties": row
-						}
-						features.append(feature)
-						# aggregate amounts
-						amt = get_amount_from_row(row)
-						if city not in agg:
-							agg[city] = {
-								'city': city_raw.strip(),
-								'state': (row.get('STATE') or row.get('State') or '').strip(),
-								'sum': 0.0,
-								'coords': coords
-							}
-						agg[city]['sum'] += amt
-					else:
-						if city:  # only track non-empty cities
-							unmatched.add(city)
-			
-			geojson = {
-				"type": "FeatureCollection",
-				"features": features
-			}
-			with open(output_path, 'w', encoding='utf-8') as out:
-				json.dump(geojson, out, indent=2)
-			# write aggregated geojson for this file
-			os.makedirs(OUTPUT_AGG, exist_ok=True)
-			agg_features = []
-			for c, info in agg.items():
-				coords = info.get('coords')
-				if not coords:
-					continue
-				total = info.get('sum', 0.0)
-				# format amount: integer-like values should be whole numbers
-				if abs(total - int(total)) < 1e-9:
-					amt_str = str(int(total))
-				else:
-					amt_str = str(total)
-				agg_features.append({
-					"type": "Feature",
-					"geometry": {"type": "Point", "coordinates": coords},
-					"properties": {"CITY": info.get('city'), "STATE": info.get('state'), "AMNT": amt_str}
-				})
-			agg_geo = {"type": "FeatureCollection", "features": agg_features}
-			agg_path = os.path.join(OUTPUT_AGG, f'{base}-mt-aggregated.geojson')
-			with open(agg_path, 'w', encoding='utf-8') as aout:
-				json.dump(agg_geo, aout, indent=2)
-			
-			print(f"\n{filename}:")
-			print(f"  Matched {len(matched)} unique cities: {sorted(matched)}")
-			print(f"  Unmatched {len(unmatched)} unique cities: {sorted(unmatched)}")
-			print(f"  Aggregated {len(agg_features)} cities written to {agg_path}")
+def process_one(filename, city_points, zip_points):
+	"""Map one -mt.csv file in INPUT_DIR to its GeoJSON outputs; return the report."""
+	base = filename[:-7]
+	input_path = os.path.join(INPUT_DIR, filename)
+	with open(input_path, newline='', encoding='utf-8') as f:
+		reader = csv.reader(f)
+		fieldnames = next(reader, [])
+		return write_outputs(base, filename, fieldnames, reader, city_points, zip_points)
+
+def main():
+	os.makedirs(OUTPUT_DIR, exist_ok=True)
+	city_points, zip_points = load_points()
+
+	with os.scandir(INPUT_DIR) as it:
+		filenames = [e.name for e in it if e.is_file() and e.name.endswith('-mt.csv')]
+	if not filenames:
+		return
+	# Each file is read and written independently, so map them in parallel
+	nproc = min(len(filenames), os.cpu_count() or 1)
+	with ProcessPoolExecutor(max_workers=nproc) as pool:
+		futures = [pool.submit(process_one, filename, city_points, zip_points) for filename in filenames]
+		for future in as_completed(futures):
+			print(future.result())
 
 if __name__ == '__main__':
 	main()
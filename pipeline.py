@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Run the Montana pipeline in a single pass over each data/all-states/*-all.csv.
+
+Equivalent to running filter-montana.py, analyze-data.py and
+map-to-municipality.py in sequence, but each source CSV is read only once:
+STATE == MT rows are kept, their totals accumulated, and the per-row and
+aggregated GeoJSON built from the same in-memory rows. The -mt.csv files are
+still written because make_half_aggregated.py, unique_zipcodes.py and
+calculate_totals.py read them.
+
+Usage: python3 pipeline.py
+"""
+import importlib
+import os
+
+# the stage scripts have hyphenated file names, so load them by module name
+filter_montana = importlib.import_module('filter-montana')
+analyze_data = importlib.import_module('analyze-data')
+mapper = importlib.import_module('map-to-municipality')
+
+
+def main():
+    os.makedirs(filter_montana.OUTPUT_DIR, exist_ok=True)
+    os.makedirs(mapper.OUTPUT_DIR, exist_ok=True)
+    city_points, zip_points = mapper.load_points()
+
+    results = []
+    with os.scandir(filter_montana.INPUT_DIR) as it:
+        filenames = [e.name for e in it if e.is_file() and e.name.endswith('-all.csv')]
+    for filename in filenames:
+        base = filename[:-8]  # remove '-all.csv'
+        input_path = os.path.join(filter_montana.INPUT_DIR, filename)
+        mt_filename = f'{base}-mt.csv'
+
+        # filter: only normalize AMOUNT for prop-50
+        fieldnames, rows = filter_montana.read_mt_rows(input_path, normalize_amounts=(base == 'prop-50'))
+        filter_montana.write_rows(os.path.join(filter_montana.OUTPUT_DIR, mt_filename), fieldnames, rows)
+
+        # totals
+        total = 0
+        idx = analyze_data.get_amount_index(fieldnames)
+        if idx is not None:
+            total = sum(analyze_data.parse_cents(row[idx]) for row in rows)
+        results.append(f"{base} - {analyze_data.format_total(total)}")
+
+        # geojson
+        print(mapper.write_outputs(base, mt_filename, fieldnames, rows, city_points, zip_points))
+
+    os.makedirs(os.path.dirname(analyze_data.OUTPUT_FILE), exist_ok=True)
+    with open(analyze_data.OUTPUT_FILE, 'w', encoding='utf-8') as out:
+        for line in results:
+            out.write(line + '\n')
+
+
+if __name__ == '__main__':
+    main()
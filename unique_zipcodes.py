@@ -10,6 +10,46 @@ import re
 INPUT_GLOB = 'data/mt-filtered/*.csv'
 OUTPUT_CSV = 'unique-zipcodes.csv'
 
+# column names checked for a ZIP value, in order of preference
+ZIP_KEYS = ['ZIP', 'Zip', 'zip', 'postal', 'postal_code', 'postalcode', 'zipcode']
+# regex to capture 5-digit or 5-4 format
+ZIP_RE = re.compile(r'(\d{5}(?:-\d{4})?)')
+NINE_RE = re.compile(r'(\d{9})')
+
+
+def extract_zip(s):
+    """Return the first ZIP-like token in s, or None."""
+    m = ZIP_RE.search(s)
+    if m:
+        return m.group(1)
+    m2 = NINE_RE.search(s)
+    if m2:
+        g = m2.group(1)
+        return f"{g[:5]}-{g[5:]}"
+    return None
+
+
+def find_zip_column(header):
+    """Return the index of the first ZIP_KEYS column present in header, or None.
+
+    Names match exactly, as find_zip_in_row does on a row dict.
+    """
+    for k in ZIP_KEYS:
+        if k in header:
+            return header.index(k)
+    return None
+
+
+def row_dict(header, row):
+    """Map a csv.reader row to the dict csv.DictReader would give for it."""
+    d = dict(zip(header, row))
+    if len(row) > len(header):
+        d[None] = row[len(header):]
+    else:
+        for k in header[len(row):]:
+            d[k] = None
+    return d
+
 
 def find_zip_in_row(row):
     """Return a ZIP-like token from a CSV row.
@@ -21,38 +61,61 @@ def find_zip_in_row(row):
     """
     if not row:
         return None
-    keys = ['ZIP', 'Zip', 'zip', 'postal', 'postal_code', 'postalcode', 'zipcode']
-    # regex to capture 5-digit or 5-4 format
-    pat = re.compile(r'(\d{5}(?:-\d{4})?)')
-    nine = re.compile(r'(\d{9})')
 
-    for k in keys:
+    for k in ZIP_KEYS:
         if k in row and row[k] is not None:
             s = str(row[k]).strip()
             if not s:
                 return None
-            m = pat.search(s)
-            if m:
-                return m.group(1)
-            m2 = nine.search(s)
-            if m2:
-                g = m2.group(1)
-                return f"{g[:5]}-{g[5:]}"
+            z = extract_zip(s)
+            if z:
+                return z
     # fallback: search all fields
     for v in row.values():
         if v is None:
             continue
-        s = str(v)
-        m = pat.search(s)
-        if m:
-            return m.group(1)
-        m2 = nine.search(s)
-        if m2:
-            g = m2.group(1)
-            return f"{g[:5]}-{g[5:]}"
+        z = extract_zip(str(v))
+        if z:
+            return z
     return None
 
 
+def read_zips(path):
+    """Return the set of ZIP tokens found in the CSV at path."""
+    zips = set()
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        idx = find_zip_column(header)
+        if idx is None:
+            for row in reader:
+                z = find_zip_in_row(row_dict(header, row))
+                if z:
+                    zips.add(z)
+            return zips
+        # read only the ZIP column and tokenize each distinct value once
+        tokens = {}
+        for row in reader:
+            if idx >= len(row):
+                # short row: the ZIP field is missing, so scan the whole row
+                z = find_zip_in_row(row_dict(header, row))
+                if z:
+                    zips.add(z)
+                continue
+            s = row[idx].strip()
+            if not s:
+                continue
+            if s not in tokens:
+                tokens[s] = extract_zip(s)
+            z = tokens[s]
+            if z is None:
+                # nothing ZIP-like in the ZIP column; scan the whole row
+                z = find_zip_in_row(row_dict(header, row))
+            if z:
+                zips.add(z)
+    return zips
+
+
 def main():
     files = glob.glob(INPUT_GLOB)
     if not files:
@@ -62,12 +125,7 @@ def main():
     zips = set()
     for path in files:
         try:
-            with open(path, newline='', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    z = find_zip_in_row(row)
-                    if z:
-                        zips.add(z)
+            zips.update(read_zips(path))
         except Exception as e:
             print(f'Warning: failed to read {path}: {e}')
 
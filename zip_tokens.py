@@ -0,0 +1,21 @@
+"""ZIP code token helpers shared by make_half_aggregated.py and map-to-municipality.py."""
+
+# str.translate table that deletes every Latin-1 non-digit character
+KEEP_DIGITS = str.maketrans('', '', ''.join(chr(c) for c in range(256) if not chr(c).isdigit()))
+
+
+def normalize_zip_token(s):
+    """Return the lookup token for a raw ZIP value, or None if it has under 5 digits.
+
+    A dashed value is used as-is, exactly 9 digits become ZIP+4 and anything
+    else uses its first five digits.
+    """
+    s = (s or '').strip()
+    if '-' in s:
+        return s
+    digits = s.translate(KEEP_DIGITS)
+    if len(digits) == 9:
+        return f"{digits[:5]}-{digits[5:]}"
+    if len(digits) >= 5:
+        return digits[:5]
+    return None